@@ -1,24 +1,206 @@
 import os
 import json
 import time
+import sys
+import argparse
 import threading
+from collections import OrderedDict, deque
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+import httpx
 import base64
+import csv
+import io
+import zlib
+import cProfile
+import pstats
+import itertools
+import math
+import statistics
+import html
+import random
+import uuid
 from datetime import datetime, timedelta
-from flask import Flask, request, jsonify, render_template_string
+from urllib.parse import quote, urlparse
+from flask import Flask, Response, g, request, jsonify, render_template_string, stream_with_context
 from twilio.rest import Client
+from twilio.http.http_client import TwilioHttpClient
 from twilio.twiml.voice_response import VoiceResponse, Gather, Play
 import openai
 from openai import OpenAI
 import logging
 from apscheduler.schedulers.background import BackgroundScheduler
 import sqlite3
-from typing import Dict, List
+import re
+from typing import Dict, List, Optional, Tuple
+
+class HttpPool:
+    """Shared outbound HTTP layer - one keep-alive pool per upstream provider.
+
+    Every provider gets explicit connect/read timeouts and a blocking
+    connection pool, which also caps how many requests run against it at
+    once. Only idempotent methods are retried, so a POST that creates a call
+    or an SMS is never sent twice.
+    """
+
+    # provider: (connect timeout s, read timeout s, max concurrent connections)
+    PROVIDERS = {
+        'ngrok': (1, 2, 2),
+        'elevenlabs': (3, 15, 4),
+        'openai': (3, 20, 8),
+        'twilio': (3, 10, 8)
+    }
+    RETRY = Retry(
+        total=2,
+        backoff_factor=0.3,
+        status_forcelist=[502, 503, 504],
+        allowed_methods=Retry.DEFAULT_ALLOWED_METHODS,  # Idempotent methods only - never POST
+        raise_on_status=False
+    )
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.sessions = {}
+        self.adapters = {}
+        self.counters = {}
+
+    def _host(self, host: str) -> Dict:
+        return self.counters.setdefault(
+            host, {'requests': 0, 'errors': 0, 'total_ms': 0.0, 'max_ms': 0.0}
+        )
+
+    def record(self, host: str, elapsed: float, error: bool = False):
+        with self.lock:
+            counters = self._host(host)
+            counters['requests'] += 1
+            counters['errors'] += int(error)
+            counters['total_ms'] += elapsed * 1000
+            counters['max_ms'] = max(counters['max_ms'], elapsed * 1000)
+
+    def record_connection(self, host: str):
+        """Count a freshly opened TCP connection (httpx providers)"""
+        with self.lock:
+            counters = self._host(host)
+            counters['connections_opened'] = counters.get('connections_opened', 0) + 1
+
+    def timeout(self, provider: str) -> Tuple[float, float]:
+        connect, read, _ = self.PROVIDERS[provider]
+        return connect, read
+
+    def session(self, provider: str) -> requests.Session:
+        with self.lock:
+            if provider not in self.sessions:
+                _, _, max_connections = self.PROVIDERS[provider]
+                adapter = TimedHTTPAdapter(
+                    self,
+                    pool_connections=1,
+                    pool_maxsize=max_connections,
+                    pool_block=True,
+                    max_retries=self.RETRY
+                )
+                session = requests.Session()
+                session.mount('http://', adapter)
+                session.mount('https://', adapter)
+                self.sessions[provider] = session
+                self.adapters[provider] = adapter
+            return self.sessions[provider]
+
+    def request(self, provider: str, method: str, url: str, **kwargs) -> requests.Response:
+        kwargs.setdefault('timeout', self.timeout(provider))
+        return self.session(provider).request(method, url, **kwargs)
+
+    def httpx_client(self, provider: str) -> httpx.Client:
+        """Pooled httpx client for SDKs built on httpx (OpenAI)"""
+        connect, read, max_connections = self.PROVIDERS[provider]
+        return httpx.Client(
+            transport=TimedHTTPTransport(
+                self,
+                limits=httpx.Limits(max_connections=max_connections, max_keepalive_connections=max_connections)
+            ),
+            timeout=httpx.Timeout(read, connect=connect)
+        )
+
+    def stats(self) -> Dict:
+        with self.lock:
+            hosts = {
+                host: dict(
+                    counters,
+                    avg_ms=round(counters['total_ms'] / counters['requests'], 1) if counters['requests'] else None,
+                    total_ms=round(counters['total_ms'], 1),
+                    max_ms=round(counters['max_ms'], 1)
+                )
+                for host, counters in self.counters.items()
+            }
+            adapters = dict(self.adapters)
+
+        # httpx hosts count connects via trace events; the rest of their requests reused one
+        for counters in hosts.values():
+            if 'connections_opened' in counters:
+                counters['connections_reused'] = max(counters['requests'] - counters['connections_opened'], 0)
+
+        # urllib3 tracks connections opened vs requests sent per host pool
+        for adapter in adapters.values():
+            for pool_key in list(adapter.poolmanager.pools.keys()):
+                pool = adapter.poolmanager.pools.get(pool_key)
+                if pool is None or pool.host not in hosts:
+                    continue
+                hosts[pool.host]['connections_opened'] = pool.num_connections
+                hosts[pool.host]['connections_reused'] = max(pool.num_requests - pool.num_connections, 0)
+        return hosts
+
+class TimedHTTPAdapter(HTTPAdapter):
+    """Requests adapter that reports per-host latency to HttpPool"""
+
+    def __init__(self, pool, **kwargs):
+        self.http_pool = pool
+        super().__init__(**kwargs)
+
+    def send(self, request, **kwargs):
+        host = urlparse(request.url).hostname
+        started = time.perf_counter()
+        try:
+            response = super().send(request, **kwargs)
+        except Exception:
+            self.http_pool.record(host, time.perf_counter() - started, error=True)
+            raise
+        self.http_pool.record(host, time.perf_counter() - started, error=response.status_code >= 500)
+        return response
+
+class TimedHTTPTransport(httpx.HTTPTransport):
+    """httpx transport that reports per-host latency and new connections to HttpPool"""
+
+    def __init__(self, pool, **kwargs):
+        self.http_pool = pool
+        super().__init__(**kwargs)
+
+    def handle_request(self, request):
+        host = request.url.host
+        upstream_trace = request.extensions.get('trace')
+
+        # httpcore reports each new TCP connection through the trace extension
+        def trace(event_name, info):
+            if event_name == 'connection.connect_tcp.complete':
+                self.http_pool.record_connection(host)
+            if upstream_trace:
+                upstream_trace(event_name, info)
+
+        request.extensions['trace'] = trace
+        started = time.perf_counter()
+        try:
+            response = super().handle_request(request)
+        except Exception:
+            self.http_pool.record(host, time.perf_counter() - started, error=True)
+            raise
+        self.http_pool.record(host, time.perf_counter() - started, error=response.status_code >= 500)
+        return response
+
+http_pool = HttpPool()
 
 def get_ngrok_url():
     """Automatically detect ngrok URL"""
     try:
-        response = requests.get('http://127.0.0.1:4040/api/tunnels', timeout=5)
+        response = http_pool.request('ngrok', 'GET', 'http://127.0.0.1:4040/api/tunnels')
         data = response.json()
         for tunnel in data['tunnels']:
             if tunnel['config']['addr'] == 'http://localhost:5000':
@@ -50,7 +232,7 @@ def generate_speech_elevenlabs(text: str, voice_id: str = "21m00Tcm4TlvDq8ikWAM"
             }
         }
         
-        response = requests.post(url, json=data, headers=headers)
+        response = http_pool.request('elevenlabs', 'POST', url, json=data, headers=headers)
         if response.status_code == 200:
             # Save audio file
             filename = f"audio_{int(time.time())}.mp3"
@@ -104,6 +286,69 @@ class Config:
     OPENAI_VOICE = "nova"  # Options: alloy, echo, fable, onyx, nova, shimmer (nova = female, onyx = male)
     USE_FAST_VOICE = True  # Use Twilio's fastest voices for instant responses
 
+    # Call Queue - persisted in leads.db so restarts don't drop calls
+    CALL_MAX_ATTEMPTS = 4  # Give up on a lead after this many failed dials
+    CALL_RETRY_BASE_SECONDS = 60  # First retry waits ~1 minute, then doubles
+    CALL_RETRY_MAX_SECONDS = 1800  # Never wait more than 30 minutes between dials
+    CALL_QUEUE_POLL_SECONDS = 5  # How often the dispatcher looks for due calls
+    CALL_QUEUE_BATCH_SIZE = 20  # Max calls dialed per dispatcher tick
+    CALL_JOB_LEASE_SECONDS = 600  # A 'running' job older than this is presumed abandoned - covers a full batch of dials at Twilio's 13s worst case
+
+    # Lead Intake
+    DEFAULT_COUNTRY_CODE = "91"  # Assumed for numbers entered without a country code
+    # Valid national number lengths per country code - DEFAULT_COUNTRY_CODE must be listed
+    NATIONAL_NUMBER_LENGTHS = {"91": (10,), "1": (10,), "44": (10,), "61": (9,), "971": (9,)}
+    DEDUP_WINDOW_MINUTES = 24 * 60  # No new call while a pending, running or completed one falls within this long
+
+    # Admission Control - keeps form floods from starving the /voice/* webhooks
+    INTAKE_RATE_PER_SECOND = 20  # Global sustained submissions per second
+    INTAKE_BURST = 50  # Global burst allowance
+    INTAKE_IP_RATE_PER_MINUTE = 5  # Sustained submissions per client IP
+    INTAKE_IP_BURST = 3  # Per-IP burst allowance (covers double-clicks)
+    INTAKE_WORKERS = 4  # Max submissions processed at once - the rest of the threads stay free for voice
+    INTAKE_QUEUE_SIZE = 32  # Max submissions waiting or in progress before we shed load
+    INTAKE_QUEUE_WAIT_SECONDS = 2  # How long a queued submission waits for a worker
+    TRUSTED_PROXY_HOPS = 1  # Proxies in front of us (ngrok); 0 = ignore X-Forwarded-For
+
+    # Post-Call Pipeline - /voice/end only enqueues, these workers do the rest
+    CALL_EVENT_WORKERS = 2  # Background threads scoring and persisting finished calls
+    CALL_EVENT_BATCH_SIZE = 50  # Finished calls handled per worker batch
+    CALL_EVENT_POLL_SECONDS = 2  # Idle workers re-check the queue this often
+    CALL_EVENT_LEASE_SECONDS = 300  # Renewed before every intent check, so it only has to outlast one LLM call (23s worst case) plus the batch write
+    CALL_EVENT_MAX_ATTEMPTS = 5  # Events failing this many times are parked as 'failed'
+
+    # Conversation Turns - buffered in memory and written to call_turns in batches
+    TURN_FLUSH_SECONDS = 1  # How often buffered turns are written
+    TURN_MIGRATION_BATCH_SIZE = 500  # Leads converted per transaction when migrating old conversation_log blobs
+
+    # Transcript Search
+    SEARCH_PAGE_SIZE = 20  # Results per page on /leads/search
+
+    # Dashboard Stats
+    STATS_MAX_HOURS = 7 * 24  # Longest hourly funnel /leads/stats will return
+    STATS_MAX_DAYS = 90  # Longest per-day status breakdown /leads/stats will return
+
+    # Exports
+    EXPORT_FETCH_SIZE = 500  # Rows pulled from the SQLite cursor per fetch while streaming
+
+    # Adaptive Gather - listen timeouts tuned from how quickly callers answer
+    ADAPTIVE_GATHER_SHARE = 0.9  # Fraction of calls using adaptive timeouts; the rest keep the fixed ones for comparison
+    GATHER_TIMEOUT_MIN = 4  # Seconds to wait for the caller to start talking
+    GATHER_TIMEOUT_MAX = 10
+    GATHER_SPEECH_TIMEOUT_MIN = 1  # Seconds of silence that end the caller's answer
+    GATHER_SPEECH_TIMEOUT_MAX = 4
+    GATHER_HISTORY_SIZE = 500  # Recent response delays kept for the global estimate
+    BOT_WORDS_PER_SECOND = 2.7  # Neural voice at rate 1.1
+    CALLER_WORDS_PER_SECOND = 2.3
+
+    # Request Profiling - hooks are only installed when enabled, so off means zero overhead
+    PROFILING_ENABLED = os.getenv('PROFILING_ENABLED', '').lower() in ('1', 'true', 'yes')
+    PROFILE_SAMPLE_EVERY = 0  # Profile 1 in N requests (0 = only on header)
+    PROFILE_HEADER = 'X-Profile-Request'  # Send this header with value '1' to profile one request
+    PROFILE_DIR = 'profiles'
+    PROFILE_MAX_FILES = 50  # Oldest profiles are deleted past this
+    PROFILE_TOP_N = 15  # Hot functions shown per profile on /profiles
+
 # Initialize Flask app
 app = Flask(__name__)
 app.config['SECRET_KEY'] = 'your-secret-key'
@@ -116,8 +361,17 @@ def serve_static(filename):
     return send_from_directory('static', filename)
 
 # Initialize services
-twilio_client = Client(Config.TWILIO_ACCOUNT_SID, Config.TWILIO_AUTH_TOKEN)
-openai_client = OpenAI(api_key=Config.OPENAI_API_KEY)
+twilio_http = TwilioHttpClient()
+twilio_http.timeout = http_pool.timeout('twilio')  # (connect, read) - the constructor only accepts a single number
+twilio_http.session = http_pool.session('twilio')  # Twilio sends through our pooled session
+twilio_client = Client(Config.TWILIO_ACCOUNT_SID, Config.TWILIO_AUTH_TOKEN, http_client=twilio_http)
+openai_http = http_pool.httpx_client('openai')
+openai_client = OpenAI(
+    api_key=Config.OPENAI_API_KEY,
+    http_client=openai_http,
+    timeout=openai_http.timeout,
+    max_retries=0  # Completions and TTS are POSTs - don't retry non-idempotent requests
+)
 scheduler = BackgroundScheduler(daemon=True)
 scheduler.start()
 
@@ -129,6 +383,8 @@ logger = logging.getLogger(__name__)
 def init_db():
     conn = sqlite3.connect('leads.db')
     cursor = conn.cursor()
+    # WAL lets long exports read while webhooks keep writing
+    cursor.execute("PRAGMA journal_mode=WAL")
     cursor.execute('''
         CREATE TABLE IF NOT EXISTS leads (
             id INTEGER PRIMARY KEY AUTOINCREMENT,
@@ -139,44 +395,534 @@ def init_db():
             call_scheduled BOOLEAN DEFAULT FALSE,
             call_completed BOOLEAN DEFAULT FALSE,
             interested BOOLEAN DEFAULT FALSE,
-            conversation_log TEXT
+            conversation_log TEXT,
+            phone_e164 TEXT
+        )
+    ''')
+    migrate_leads_phone(cursor)
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_leads_created_at ON leads (created_at)")
+    # One lead per number - duplicate lookup is an index seek, not a scan
+    cursor.execute("CREATE UNIQUE INDEX IF NOT EXISTS idx_leads_phone_e164 ON leads (phone_e164)")
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS call_jobs (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            lead_id INTEGER NOT NULL,
+            phone TEXT NOT NULL,
+            run_at REAL NOT NULL,
+            attempts INTEGER DEFAULT 0,
+            status TEXT DEFAULT 'pending',
+            last_error TEXT,
+            claimed_at REAL,
+            dialed_at REAL,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    ''')
+    add_missing_columns(cursor, 'call_jobs', {'claimed_at': 'REAL', 'dialed_at': 'REAL'})
+    # Due-job lookup is a range scan on this index, not a table scan
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_call_jobs_due ON call_jobs (status, run_at)")
+    # Per-lead lookup for the resubmission dedup check
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_call_jobs_lead ON call_jobs (lead_id, run_at)")
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS call_attempts (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            lead_id INTEGER NOT NULL,
+            job_id INTEGER NOT NULL,
+            attempt INTEGER NOT NULL,
+            call_sid TEXT,
+            error TEXT,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    ''')
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_call_attempts_lead ON call_attempts (lead_id)")
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS call_events (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            lead_id INTEGER NOT NULL,
+            call_sid TEXT,
+            conversation_log TEXT,
+            status TEXT DEFAULT 'pending',
+            attempts INTEGER DEFAULT 0,
+            claimed_at REAL,
+            lease_token TEXT,
+            interested BOOLEAN,
+            notified BOOLEAN DEFAULT FALSE,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    ''')
+    add_missing_columns(cursor, 'call_events', {
+        'lease_token': 'TEXT',
+        'interested': 'BOOLEAN',
+        'notified': 'BOOLEAN DEFAULT FALSE'
+    })
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_call_events_status ON call_events (status, id)")
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS call_turns (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            lead_id INTEGER NOT NULL,
+            call_sid TEXT,
+            turn_index INTEGER NOT NULL,
+            role TEXT NOT NULL,
+            text TEXT,
+            matched TEXT,
+            llm_ms REAL,
+            tts_ms REAL,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    ''')
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_call_turns_call ON call_turns (call_sid, turn_index)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_call_turns_lead ON call_turns (lead_id, turn_index)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_call_turns_matched ON call_turns (matched)")
+    # Counters kept in step with leads so the dashboard never counts rows
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS lead_status_counts (
+            day TEXT NOT NULL,
+            status TEXT NOT NULL,
+            count INTEGER NOT NULL DEFAULT 0,
+            PRIMARY KEY (day, status)
+        )
+    ''')
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS lead_funnel_counts (
+            hour TEXT NOT NULL,
+            stage TEXT NOT NULL,
+            count INTEGER NOT NULL DEFAULT 0,
+            PRIMARY KEY (hour, stage)
+        )
+    ''')
+    # One document per call; rowid is the call_events id (or -lead_id for migrated transcripts)
+    cursor.execute('''
+        CREATE VIRTUAL TABLE IF NOT EXISTS transcripts_fts USING fts5(
+            transcript,
+            lead_id UNINDEXED,
+            call_sid UNINDEXED,
+            tokenize = 'porter unicode61'
         )
     ''')
     conn.commit()
+    
+    # Databases created before the counters existed start from a full rebuild
+    if not cursor.execute("SELECT 1 FROM lead_status_counts LIMIT 1").fetchone():
+        LeadStats.rebuild(cursor)
+        conn.commit()
     conn.close()
 
-class LeadManager:
+def migrate_leads_phone(cursor):
+    """Add and backfill phone_e164 on databases created before it existed"""
+    columns = [row[1] for row in cursor.execute("PRAGMA table_info(leads)")]
+    if 'phone_e164' in columns:
+        return
+
+    cursor.execute("ALTER TABLE leads ADD COLUMN phone_e164 TEXT")
+
+    # Newest lead keeps the number; older duplicates stay NULL so the unique index builds
+    seen = set()
+    rows = cursor.execute("SELECT id, phone FROM leads ORDER BY id DESC").fetchall()
+    for lead_id, phone in rows:
+        e164 = normalize_phone(phone)
+        if e164 and e164 not in seen:
+            seen.add(e164)
+            cursor.execute("UPDATE leads SET phone_e164 = ? WHERE id = ?", (e164, lead_id))
+
+def add_missing_columns(cursor, table: str, columns: Dict[str, str]):
+    """Add columns introduced after a table was first created"""
+    existing = [row[1] for row in cursor.execute(f"PRAGMA table_info({table})")]
+    for name, definition in columns.items():
+        if name not in existing:
+            cursor.execute(f"ALTER TABLE {table} ADD COLUMN {name} {definition}")
+
+def normalize_phone(phone: str) -> Optional[str]:
+    """Normalize a user-entered phone number to E.164, or None if it can't be"""
+    if not phone:
+        return None
+
+    phone = phone.strip()
+    digits = re.sub(r'\D', '', phone)
+    country_code = Config.DEFAULT_COUNTRY_CODE
+    national_lengths = Config.NATIONAL_NUMBER_LENGTHS[country_code]
+
+    if phone.startswith('+'):
+        pass
+    elif digits.startswith('00'):
+        digits = digits[2:]  # International dialing prefix
+    elif len(digits.lstrip('0')) in national_lengths:
+        digits = country_code + digits.lstrip('0')  # National number, with or without trunk prefix
+    elif not (digits.startswith(country_code) and len(digits) - len(country_code) in national_lengths):
+        return None  # Neither a national number nor one already carrying our country code
+
+    if not 8 <= len(digits) <= 15 or digits.startswith('0'):
+        return None
+
+    # Check the national part for countries we know, longest code first ('971' before '9...')
+    for code in sorted(Config.NATIONAL_NUMBER_LENGTHS, key=len, reverse=True):
+        if digits.startswith(code):
+            if len(digits) - len(code) not in Config.NATIONAL_NUMBER_LENGTHS[code]:
+                return None
+            break
+    return f"+{digits}"
+
+def lead_status(call_scheduled, call_completed, interested) -> str:
+    if call_completed:
+        return 'interested' if interested else 'not_interested'
+    if call_scheduled:
+        return 'called'
+    return 'pending'
+
+class LeadStats:
+    """Per-status and per-hour counters, updated in the same transaction as the lead"""
+
+    STATUSES = ['pending', 'called', 'interested', 'not_interested']
+    STAGES = ['submitted', 'called', 'completed', 'interested']
+    # SQL twin of lead_status()
+    STATUS_SQL = """
+        CASE WHEN call_completed AND interested THEN 'interested'
+             WHEN call_completed THEN 'not_interested'
+             WHEN call_scheduled THEN 'called'
+             ELSE 'pending' END
+    """
+
+    @staticmethod
+    def snapshot(cursor, lead_id: int) -> Optional[Tuple[str, str]]:
+        """(created day, status) of a lead.
+
+        Callers must hold a write transaction (BEGIN IMMEDIATE) so nothing can
+        change the row between this read and their UPDATE.
+        """
+        cursor.execute(
+            "SELECT date(created_at), call_scheduled, call_completed, interested FROM leads WHERE id = ?",
+            (lead_id,)
+        )
+        row = cursor.fetchone()
+        if not row:
+            return None
+        return row[0], lead_status(row[1], row[2], row[3])
+
+    @staticmethod
+    def _bump_status(cursor, day: str, status: str, delta: int):
+        cursor.executemany(
+            "INSERT INTO lead_status_counts (day, status, count) VALUES (?, ?, ?) "
+            "ON CONFLICT (day, status) DO UPDATE SET count = count + excluded.count",
+            [(day, status, delta), ('all', status, delta)]
+        )
+
+    @staticmethod
+    def _bump_stage(cursor, stage: str):
+        cursor.execute(
+            "INSERT INTO lead_funnel_counts (hour, stage, count) VALUES (strftime('%Y-%m-%dT%H', 'now'), ?, 1) "
+            "ON CONFLICT (hour, stage) DO UPDATE SET count = count + 1",
+            (stage,)
+        )
+
+    @staticmethod
+    def record_transition(cursor, before: Optional[Tuple[str, str]], after: Optional[Tuple[str, str]]):
+        """Move a lead between status counters and count the funnel stages it reached"""
+        if before == after or after is None:
+            return
+
+        old_status = before[1] if before else None
+        day, new_status = after
+        if before:
+            LeadStats._bump_status(cursor, before[0], old_status, -1)
+        LeadStats._bump_status(cursor, day, new_status, 1)
+
+        finished = ('interested', 'not_interested')
+        if old_status is None:
+            LeadStats._bump_stage(cursor, 'submitted')
+        if new_status == 'called':
+            LeadStats._bump_stage(cursor, 'called')
+        if new_status in finished and old_status not in finished:
+            LeadStats._bump_stage(cursor, 'completed')
+        if new_status == 'interested':
+            LeadStats._bump_stage(cursor, 'interested')
+
+    @staticmethod
+    def rebuild(cursor=None):
+        """Recompute status counters from the leads table.
+
+        Funnel counters record when transitions happened, which the leads
+        table doesn't keep, so only 'submitted' is rebuilt for them.
+        """
+        own_conn = cursor is None
+        if own_conn:
+            conn = sqlite3.connect('leads.db')
+            cursor = conn.cursor()
+
+        cursor.execute("DELETE FROM lead_status_counts")
+        cursor.execute(f'''
+            INSERT INTO lead_status_counts (day, status, count)
+            SELECT date(created_at), {LeadStats.STATUS_SQL} AS status, COUNT(*)
+            FROM leads
+            GROUP BY 1, 2
+        ''')
+        cursor.execute('''
+            INSERT INTO lead_status_counts (day, status, count)
+            SELECT 'all', status, SUM(count) FROM lead_status_counts GROUP BY status
+        ''')
+        cursor.execute("DELETE FROM lead_funnel_counts WHERE stage = 'submitted'")
+        cursor.execute('''
+            INSERT INTO lead_funnel_counts (hour, stage, count)
+            SELECT strftime('%Y-%m-%dT%H', created_at), 'submitted', COUNT(*)
+            FROM leads
+            GROUP BY 1
+        ''')
+
+        if own_conn:
+            conn.commit()
+            conn.close()
+
     @staticmethod
-    def save_lead(name: str, email: str, phone: str) -> int:
+    def totals() -> Dict[str, int]:
         conn = sqlite3.connect('leads.db')
         cursor = conn.cursor()
+        cursor.execute("SELECT status, count FROM lead_status_counts WHERE day = 'all'")
+        counts = dict(cursor.fetchall())
+        conn.close()
+        return {status: counts.get(status, 0) for status in LeadStats.STATUSES}
+
+    @staticmethod
+    def summary(hours: int, days: int) -> Dict:
+        """Totals, conversion rates, hourly funnel and daily breakdown - reads only counter rows"""
+        conn = sqlite3.connect('leads.db')
+        cursor = conn.cursor()
+
+        cursor.execute("SELECT status, count FROM lead_status_counts WHERE day = 'all'")
+        counts = dict(cursor.fetchall())
+        totals = {status: counts.get(status, 0) for status in LeadStats.STATUSES}
+
         cursor.execute(
-            "INSERT INTO leads (name, email, phone) VALUES (?, ?, ?)",
-            (name, email, phone)
+            "SELECT hour, stage, count FROM lead_funnel_counts "
+            "WHERE hour >= strftime('%Y-%m-%dT%H', 'now', ?) ORDER BY hour",
+            (f'-{hours - 1} hours',)
         )
-        lead_id = cursor.lastrowid
-        conn.commit()
+        hourly = {}
+        for hour, stage, count in cursor.fetchall():
+            hourly.setdefault(hour, {stage: 0 for stage in LeadStats.STAGES})[stage] = count
+
+        cursor.execute(
+            "SELECT day, status, count FROM lead_status_counts "
+            "WHERE day != 'all' AND day >= date('now', ?) ORDER BY day",
+            (f'-{days - 1} days',)
+        )
+        daily = {}
+        for day, status, count in cursor.fetchall():
+            daily.setdefault(day, {status: 0 for status in LeadStats.STATUSES})[status] = count
+
         conn.close()
-        return lead_id
-    
+
+        total = sum(totals.values())
+        reached_call = total - totals['pending']
+        completed = totals['interested'] + totals['not_interested']
+
+        def rate(numerator, denominator):
+            return round(numerator / denominator, 4) if denominator else 0.0
+
+        return {
+            'total_leads': total,
+            'by_status': totals,
+            'conversion': {
+                'called_rate': rate(reached_call, total),
+                'completion_rate': rate(completed, reached_call),
+                'interest_rate': rate(totals['interested'], completed),
+                'overall_rate': rate(totals['interested'], total)
+            },
+            'hourly_funnel': [dict(hour=hour, **stages) for hour, stages in hourly.items()],
+            'daily_status': [dict(day=day, **statuses) for day, statuses in daily.items()]
+        }
+
+class LeadExporter:
+    """Streams leads or transcript turns straight from a SQLite cursor"""
+
+    COLUMNS = {
+        'leads': [
+            'id', 'name', 'email', 'phone', 'phone_e164', 'created_at',
+            'status', 'call_scheduled', 'call_completed', 'interested'
+        ],
+        'transcripts': [
+            'lead_id', 'call_sid', 'turn_index', 'role', 'text',
+            'matched', 'llm_ms', 'tts_ms', 'created_at'
+        ]
+    }
+    FORMATS = {'csv': 'text/csv', 'ndjson': 'application/x-ndjson'}
+
+    @staticmethod
+    def parse_filters(start: str = None, end: str = None, status: str = None) -> Dict:
+        """Validate filters - raises ValueError with a user-facing message"""
+        filters = {}
+        try:
+            if start:
+                filters['start'] = datetime.strptime(start, '%Y-%m-%d').strftime('%Y-%m-%d')
+            if end:
+                # Inclusive end date -> exclusive bound on the next day
+                filters['end'] = (datetime.strptime(end, '%Y-%m-%d') + timedelta(days=1)).strftime('%Y-%m-%d')
+        except ValueError:
+            raise ValueError("Dates must be YYYY-MM-DD")
+        if status:
+            if status not in LeadStats.STATUSES:
+                raise ValueError(f"Status must be one of: {', '.join(LeadStats.STATUSES)}")
+            filters['status'] = status
+        return filters
+
+    @staticmethod
+    def _where(filters: Dict) -> Tuple[str, List]:
+        """WHERE clause over the leads table"""
+        clauses, params = [], []
+        if 'start' in filters:
+            clauses.append("created_at >= ?")
+            params.append(filters['start'])
+        if 'end' in filters:
+            clauses.append("created_at < ?")
+            params.append(filters['end'])
+        if 'status' in filters:
+            clauses.append(f"({LeadStats.STATUS_SQL}) = ?")
+            params.append(filters['status'])
+        return (" WHERE " + " AND ".join(clauses)) if clauses else "", params
+
     @staticmethod
-    def update_lead(lead_id: int, **kwargs):
+    def rows(kind: str, filters: Dict):
+        """Yield rows as dicts, fetching EXPORT_FETCH_SIZE at a time"""
+        where, params = LeadExporter._where(filters)
+        if kind == 'leads':
+            query = (
+                "SELECT id, name, email, phone, phone_e164, created_at, "
+                f"{LeadStats.STATUS_SQL} AS status, call_scheduled, call_completed, interested "
+                f"FROM leads{where} ORDER BY id"
+            )
+        else:
+            query = (
+                "SELECT lead_id, call_sid, turn_index, role, text, matched, llm_ms, tts_ms, created_at "
+                f"FROM call_turns WHERE lead_id IN (SELECT id FROM leads{where}) "
+                "ORDER BY lead_id, turn_index, id"
+            )
+
+        columns = LeadExporter.COLUMNS[kind]
         conn = sqlite3.connect('leads.db')
+        try:
+            cursor = conn.cursor()
+            cursor.execute(query, params)
+            while True:
+                batch = cursor.fetchmany(Config.EXPORT_FETCH_SIZE)
+                if not batch:
+                    break
+                for row in batch:
+                    yield dict(zip(columns, row))
+        finally:
+            conn.close()
+
+    @staticmethod
+    def encode(kind: str, fmt: str, rows):
+        """Turn rows into text chunks, one chunk per fetch batch"""
+        columns = LeadExporter.COLUMNS[kind]
+        buffer = io.StringIO()
+
+        if fmt == 'csv':
+            writer = csv.DictWriter(buffer, fieldnames=columns)
+            writer.writeheader()
+            write = writer.writerow
+        else:
+            write = lambda row: buffer.write(json.dumps(row) + "\n")
+
+        pending = 0
+        for row in rows:
+            write(row)
+            pending += 1
+            if pending >= Config.EXPORT_FETCH_SIZE:
+                yield buffer.getvalue()
+                buffer.seek(0)
+                buffer.truncate()
+                pending = 0
+
+        if buffer.tell():
+            yield buffer.getvalue()
+
+    @staticmethod
+    def stream(kind: str, fmt: str, filters: Dict, compress: bool = False):
+        """Byte chunks of the full export, optionally gzip-compressed"""
+        chunks = (chunk.encode('utf-8') for chunk in LeadExporter.encode(kind, fmt, LeadExporter.rows(kind, filters)))
+        if not compress:
+            yield from chunks
+            return
+
+        compressor = zlib.compressobj(wbits=31)  # gzip container
+        for chunk in chunks:
+            data = compressor.compress(chunk)
+            if data:
+                yield data
+        yield compressor.flush()
+
+class LeadManager:
+    @staticmethod
+    def save_lead(name: str, email: str, phone: str, phone_e164: str, call_at: float) -> Tuple[int, bool]:
+        """Insert a lead, or update the existing one for this number, and queue its call.
+
+        Returns (lead_id, is_duplicate). Duplicates are resubmissions while the
+        lead has a call job that hasn't failed within DEDUP_WINDOW_MINUTES; they
+        get no new job. The job is inserted in the same transaction as the lead,
+        so a lead is never saved without its call.
+        """
+        now = time.time()
+        conn = sqlite3.connect('leads.db', isolation_level=None)
         cursor = conn.cursor()
-        
+        try:
+            # Serialize concurrent submissions for the same number
+            cursor.execute("BEGIN IMMEDIATE")
+            cursor.execute("SELECT id FROM leads WHERE phone_e164 = ?", (phone_e164,))
+            row = cursor.fetchone()
+
+            if row:
+                lead_id = row[0]
+                cursor.execute(
+                    "UPDATE leads SET name = ?, email = ?, phone = ? WHERE id = ?",
+                    (name, email, phone, lead_id)
+                )
+                # Failed jobs don't count, so a lead we never reached can resubmit
+                cursor.execute(
+                    "SELECT 1 FROM call_jobs WHERE lead_id = ? "
+                    "AND status IN ('pending', 'running', 'done', 'unknown') AND run_at > ? LIMIT 1",
+                    (lead_id, now - Config.DEDUP_WINDOW_MINUTES * 60)
+                )
+                is_duplicate = cursor.fetchone() is not None
+            else:
+                cursor.execute(
+                    "INSERT INTO leads (name, email, phone, phone_e164) VALUES (?, ?, ?, ?)",
+                    (name, email, phone, phone_e164)
+                )
+                lead_id = cursor.lastrowid
+                is_duplicate = False
+                LeadStats.record_transition(cursor, None, LeadStats.snapshot(cursor, lead_id))
+
+            if not is_duplicate:
+                CallQueue.enqueue(cursor, lead_id, phone_e164, call_at)
+
+            cursor.execute("COMMIT")
+        except Exception:
+            if conn.in_transaction:
+                cursor.execute("ROLLBACK")
+            raise
+        finally:
+            conn.close()
+
+        return lead_id, is_duplicate
+    
+    @staticmethod
+    def update_lead(cursor, lead_id: int, **kwargs):
+        """Update a lead inside the caller's transaction, keeping LeadStats in step.
+
+        Snapshot, update and counter change must see the same row, so the caller
+        must already hold the write lock (BEGIN IMMEDIATE).
+        """
         fields = []
         values = []
         for key, value in kwargs.items():
             fields.append(f"{key} = ?")
             values.append(value)
         
-        if fields:
-            query = f"UPDATE leads SET {', '.join(fields)} WHERE id = ?"
-            values.append(lead_id)
-            cursor.execute(query, values)
+        if not fields:
+            return
         
-        conn.commit()
-        conn.close()
+        before = LeadStats.snapshot(cursor, lead_id)
+        query = f"UPDATE leads SET {', '.join(fields)} WHERE id = ?"
+        values.append(lead_id)
+        cursor.execute(query, values)
+        LeadStats.record_transition(cursor, before, LeadStats.snapshot(cursor, lead_id))
     
     @staticmethod
     def get_lead(lead_id: int) -> Dict:
@@ -190,6 +936,225 @@ class LeadManager:
             columns = [description[0] for description in cursor.description]
             return dict(zip(columns, row))
         return None
+    
+    @staticmethod
+    def get_leads(lead_ids: List[int]) -> List[Dict]:
+        if not lead_ids:
+            return []
+        
+        conn = sqlite3.connect('leads.db')
+        cursor = conn.cursor()
+        placeholders = ', '.join('?' for _ in lead_ids)
+        cursor.execute(f"SELECT * FROM leads WHERE id IN ({placeholders})", list(lead_ids))
+        rows = cursor.fetchall()
+        conn.close()
+        
+        columns = [description[0] for description in cursor.description]
+        return [dict(zip(columns, row)) for row in rows]
+    
+    @staticmethod
+    def complete_calls(results: List[Tuple[int, bool]]):
+        """Record (lead_id, interested) for many calls in one transaction"""
+        conn = sqlite3.connect('leads.db', isolation_level=None)
+        cursor = conn.cursor()
+        try:
+            cursor.execute("BEGIN IMMEDIATE")
+            for lead_id, interested in results:
+                LeadManager.update_lead(cursor, lead_id, call_completed=True, interested=interested)
+            cursor.execute("COMMIT")
+        except Exception:
+            if conn.in_transaction:
+                cursor.execute("ROLLBACK")
+            raise
+        finally:
+            conn.close()
+
+class TurnWriter:
+    """Buffers conversation turns and writes them to call_turns in batches"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.buffer = []
+
+    def add(self, lead_id: int, call_sid: str, turn_index: int, role: str, text: str,
+            matched: str = None, llm_ms: float = None, tts_ms: float = None):
+        with self.lock:
+            self.buffer.append((lead_id, call_sid, turn_index, role, text, matched, llm_ms, tts_ms))
+
+    def flush(self):
+        with self.lock:
+            rows, self.buffer = self.buffer, []
+        if not rows:
+            return
+
+        try:
+            conn = sqlite3.connect('leads.db')
+            cursor = conn.cursor()
+            cursor.executemany(
+                "INSERT INTO call_turns (lead_id, call_sid, turn_index, role, text, matched, llm_ms, tts_ms) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                rows
+            )
+            conn.commit()
+            conn.close()
+        except Exception as e:
+            # Put them back so the next flush retries
+            with self.lock:
+                self.buffer = rows + self.buffer
+            logger.error(f"Turn flush error: {e}")
+
+turn_writer = TurnWriter()
+
+def migrate_conversation_logs():
+    """Move legacy conversation_log blobs into call_turns, a batch of leads at a time.
+
+    Each batch commits on its own and clears the blobs it converted, so the
+    migration uses constant memory and can be interrupted and resumed.
+    """
+    conn = sqlite3.connect('leads.db')
+    cursor = conn.cursor()
+    last_id = 0
+    migrated = 0
+
+    while True:
+        cursor.execute(
+            "SELECT id, conversation_log FROM leads WHERE id > ? AND conversation_log IS NOT NULL ORDER BY id LIMIT ?",
+            (last_id, Config.TURN_MIGRATION_BATCH_SIZE)
+        )
+        rows = cursor.fetchall()
+        if not rows:
+            break
+
+        turns = []
+        for lead_id, conversation_log in rows:
+            try:
+                history = json.loads(conversation_log)
+            except ValueError:
+                history = []
+            for turn_index, message in enumerate(history):
+                turns.append((lead_id, turn_index, message.get('role'), message.get('content')))
+
+        cursor.executemany(
+            "INSERT INTO call_turns (lead_id, turn_index, role, text) VALUES (?, ?, ?, ?)",
+            turns
+        )
+        cursor.executemany(
+            "UPDATE leads SET conversation_log = NULL WHERE id = ?",
+            [(row[0],) for row in rows]
+        )
+        conn.commit()
+
+        last_id = rows[-1][0]
+        migrated += len(rows)
+
+    conn.close()
+    if migrated:
+        logger.info(f"Migrated conversation logs for {migrated} leads into call_turns")
+
+def start_turn_writer():
+    scheduler.add_job(
+        turn_writer.flush,
+        'interval',
+        seconds=Config.TURN_FLUSH_SECONDS,
+        id='turn_writer',
+        replace_existing=True,
+        max_instances=1,
+        coalesce=True
+    )
+
+class TranscriptIndex:
+    """FTS5 full-text index over call transcripts"""
+
+    SPEAKERS = {'user': 'Caller', 'assistant': 'Sarah'}
+
+    @staticmethod
+    def format_transcript(history: List[Dict]) -> str:
+        return "\n".join(
+            f"{TranscriptIndex.SPEAKERS.get(message.get('role'), message.get('role'))}: {message.get('content')}"
+            for message in history
+        )
+
+    @staticmethod
+    def add_many(documents: List[Tuple[int, int, str, str]]):
+        """Index (doc_id, lead_id, call_sid, transcript) - re-adding a doc_id replaces it"""
+        conn = sqlite3.connect('leads.db')
+        cursor = conn.cursor()
+        cursor.executemany(
+            "DELETE FROM transcripts_fts WHERE rowid = ?",
+            [(doc[0],) for doc in documents]
+        )
+        cursor.executemany(
+            "INSERT INTO transcripts_fts (rowid, lead_id, call_sid, transcript) VALUES (?, ?, ?, ?)",
+            documents
+        )
+        conn.commit()
+        conn.close()
+
+    @staticmethod
+    def backfill():
+        """Index transcripts migrated from conversation_log blobs.
+
+        Resumes after the highest lead already indexed, so an interrupted
+        backfill picks up where it stopped on the next startup.
+        """
+        conn = sqlite3.connect('leads.db')
+        cursor = conn.cursor()
+        last_lead_id = cursor.execute(
+            "SELECT COALESCE(MAX(-rowid), 0) FROM transcripts_fts WHERE rowid < 0"
+        ).fetchone()[0]
+
+        while True:
+            rows = cursor.execute(
+                "SELECT DISTINCT lead_id FROM call_turns WHERE call_sid IS NULL AND lead_id > ? ORDER BY lead_id LIMIT ?",
+                (last_lead_id, Config.TURN_MIGRATION_BATCH_SIZE)
+            ).fetchall()
+            if not rows:
+                break
+
+            documents = []
+            for (lead_id,) in rows:
+                turns = cursor.execute(
+                    "SELECT role, text FROM call_turns WHERE lead_id = ? AND call_sid IS NULL ORDER BY turn_index",
+                    (lead_id,)
+                ).fetchall()
+                history = [{'role': role, 'content': text} for role, text in turns]
+                documents.append((-lead_id, lead_id, None, TranscriptIndex.format_transcript(history)))
+
+            cursor.executemany(
+                "INSERT INTO transcripts_fts (rowid, lead_id, call_sid, transcript) VALUES (?, ?, ?, ?)",
+                documents
+            )
+            conn.commit()
+            last_lead_id = rows[-1][0]
+
+        conn.close()
+
+    @staticmethod
+    def search(query: str, limit: int, offset: int) -> List[Dict]:
+        """Ranked matches with highlighted snippets - raises sqlite3.OperationalError on bad syntax"""
+        conn = sqlite3.connect('leads.db')
+        cursor = conn.cursor()
+        # Control characters mark highlights so the snippet can be HTML-escaped safely
+        cursor.execute(
+            """
+            SELECT f.lead_id, f.call_sid, l.name, l.phone, l.interested,
+                   snippet(transcripts_fts, 0, char(2), char(3), '...', 24) AS snippet
+            FROM transcripts_fts f
+            JOIN leads l ON l.id = f.lead_id
+            WHERE transcripts_fts MATCH ?
+            ORDER BY bm25(transcripts_fts)
+            LIMIT ? OFFSET ?
+            """,
+            (query, limit, offset)
+        )
+        rows = cursor.fetchall()
+        conn.close()
+
+        return [
+            {'lead_id': row[0], 'call_sid': row[1], 'name': row[2], 'phone': row[3],
+             'interested': row[4], 'snippet': row[5]}
+            for row in rows
+        ]
 
 class VoiceBot:
     def __init__(self):
@@ -218,6 +1183,7 @@ class VoiceBot:
             
             # INSTANT responses - no AI needed for common inputs
             if turn == 0 and not user_input:
+                context['matched'] = 'greeting'
                 return f"Thanks for taking my call! I'm Sarah from {self.company_info['name']}. We help businesses get websites and apps that bring in customers. What kind of project are you considering?"
             
             # LIGHTNING FAST keyword responses
@@ -227,11 +1193,13 @@ class VoiceBot:
             language_keywords = ['hindi', 'हिंदी', 'marathi', 'मराठी', 'gujarati', 'tamil', 'bengali', 'spanish', 'french']
             for lang in language_keywords:
                 if lang in user_lower:
+                    context['matched'] = f'language:{lang}'
                     return f"I understand you'd prefer {lang.title()}, but I'm most comfortable in English. Can we continue in English? I promise to speak clearly and slowly."
             
             # Handle confusion or don't understand
             confusion_keywords = ['what', 'confused', 'understand', 'repeat', 'again', 'slow', 'unclear']
             if any(word in user_lower for word in confusion_keywords):
+                context['matched'] = 'confusion'
                 return "Let me speak more clearly. I'm calling about website and app development services. Are you interested in getting more customers online?"
             
             # Ultra-fast responses for common words
@@ -265,6 +1233,7 @@ class VoiceBot:
             # Check for instant matches first
             for keyword, response in instant_responses.items():
                 if keyword in user_lower:
+                    context['matched'] = f'keyword:{keyword}'
                     return response
             
             # Slightly longer phrases - still fast
@@ -287,11 +1256,13 @@ class VoiceBot:
             
             for phrase, response in quick_phrases.items():
                 if phrase in user_lower:
+                    context['matched'] = f'phrase:{phrase}'
                     return response
             
             # Only use AI for complex responses - much shorter prompt for speed
             if len(user_input) > 5:  # For any substantial input
                 try:
+                    llm_start = time.perf_counter()
                     response = openai_client.chat.completions.create(
                         model="gpt-3.5-turbo",
                         messages=[
@@ -301,15 +1272,19 @@ class VoiceBot:
                         max_tokens=30,  # Short for speed
                         temperature=0.4
                     )
+                    context['matched'] = 'llm'
+                    context['llm_ms'] = (time.perf_counter() - llm_start) * 1000
                     return response.choices[0].message.content.strip()
                 except:
-                    pass
+                    context['llm_ms'] = (time.perf_counter() - llm_start) * 1000
             
             # Final fallback - instant response
+            context['matched'] = 'fallback'
             return "That's interesting! Tell me more about what you're looking for."
             
         except Exception as e:
             logger.error(f"Response generation error: {e}")
+            context['matched'] = 'error'
             return "Great question! What's your main business challenge right now?"
     
     def detect_intent(self, conversation_log: str) -> bool:
@@ -412,53 +1387,770 @@ def add_voice_to_response(response_obj, text: str, gather_obj=None, is_important
 
 voice_bot = VoiceBot()
 
-def schedule_call(lead_id: int, phone_number: str, delay_minutes: int = 2):
-    """Schedule a call after specified delay"""
-    def make_call():
-        try:
-            logger.info(f"Making call to {phone_number} for lead {lead_id}")
-            
-            call = twilio_client.calls.create(
-                url=f"{Config.WEBHOOK_BASE_URL}/voice/start/{lead_id}",
-                to=phone_number,
-                from_=Config.TWILIO_PHONE_NUMBER,
-                method='POST'
-            )
-            
-            LeadManager.update_lead(lead_id, call_scheduled=True)
-            logger.info(f"Call initiated: {call.sid}")
-            
-        except Exception as e:
-            logger.error(f"Failed to make call: {e}")
-    
-    # Schedule the call
-    run_time = datetime.now() + timedelta(minutes=delay_minutes)
-    scheduler.add_job(make_call, 'date', run_date=run_time)
-    logger.info(f"Call scheduled for {run_time}")
+class GatherTuner:
+    """Picks Gather timeout/speechTimeout per turn from measured caller response delays.
 
-def notify_admin(lead_info: Dict):
-    """Send SMS to admin about interested lead"""
-    try:
-        message = f"""
-        🔥 NEW INTERESTED LEAD!
-        
-        Name: {lead_info['name']}
-        Email: {lead_info['email']}
-        Phone: {lead_info['phone']}
-        
-        They showed interest during the call!
-        """
-        
-        twilio_client.messages.create(
-            body=message,
+    The delay is estimated from webhook timing: the gap between sending a
+    Gather and receiving its result, minus the time spent playing our prompt,
+    the caller's own speech (from SpeechResult length) and the speechTimeout.
+    """
+
+    FIXED = {'first': (8, 3), 'next': (8, 2)}  # The original hard-coded settings
+    MAX_TRACKED_CALLS = 5000
+    STALE_SECONDS = 120  # A Gather with no result by then counts as no-input
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.calls = OrderedDict()
+        self.delays = deque(maxlen=Config.GATHER_HISTORY_SIZE)
+        self.report = {
+            mode: {'calls': 0, 'gathers': 0, 'answered': 0, 'no_input': 0,
+                   'gap_ms_total': 0.0, 'timeout_total': 0, 'speech_timeout_total': 0}
+            for mode in ('adaptive', 'fixed')
+        }
+
+    def _call(self, call_sid: str) -> Dict:
+        state = self.calls.get(call_sid)
+        if state is None:
+            mode = 'adaptive' if random.random() < Config.ADAPTIVE_GATHER_SHARE else 'fixed'
+            state = {'mode': mode, 'delays': [], 'no_input': 0, 'pending': None}
+            self.calls[call_sid] = state
+            self.report[mode]['calls'] += 1
+            if len(self.calls) > self.MAX_TRACKED_CALLS:
+                self._resolve_stale(self.calls.popitem(last=False)[1], force=True)
+        return state
+
+    def _resolve_stale(self, state: Dict, force: bool = False):
+        pending = state['pending']
+        if pending and (force or time.time() - pending['sent_at'] > self.STALE_SECONDS):
+            self.report[state['mode']]['no_input'] += 1
+            state['pending'] = None
+
+    def settings(self, call_sid: str, first: bool = False) -> Tuple[int, int]:
+        """(timeout, speechTimeout) for the next Gather on this call"""
+        with self.lock:
+            state = self._call(call_sid)
+            if state['mode'] == 'fixed':
+                return self.FIXED['first' if first else 'next']
+
+            # Per-call measurements win once we have them; otherwise use everyone's
+            samples = state['delays'][-3:] or list(self.delays)
+            if not samples:
+                return self.FIXED['first' if first else 'next']
+
+            if state['delays']:
+                slow = max(samples)
+            elif len(samples) > 1:
+                slow = statistics.quantiles(samples, n=10)[-1]  # p90 across callers
+            else:
+                slow = samples[0]
+            typical = statistics.median(samples)
+
+            timeout = math.ceil(slow * 1.5 + 2) + 2 * state['no_input']
+            # Callers who take longer to start also tend to pause longer mid-answer
+            speech_timeout = (1 if typical < 1 else 2 if typical < 2.5 else 3) + state['no_input']
+
+            return (
+                min(max(timeout, Config.GATHER_TIMEOUT_MIN), Config.GATHER_TIMEOUT_MAX),
+                min(max(speech_timeout, Config.GATHER_SPEECH_TIMEOUT_MIN), Config.GATHER_SPEECH_TIMEOUT_MAX)
+            )
+
+    def gather_sent(self, call_sid: str, prompt: str, timeout: int, speech_timeout: int):
+        with self.lock:
+            state = self._call(call_sid)
+            self.calls.move_to_end(call_sid)
+            state['pending'] = {
+                'sent_at': time.time(),
+                'prompt_words': len(prompt.split()),
+                'speech_timeout': speech_timeout
+            }
+            report = self.report[state['mode']]
+            report['gathers'] += 1
+            report['timeout_total'] += timeout
+            report['speech_timeout_total'] += speech_timeout
+
+    def gather_result(self, call_sid: str, speech_result: str):
+        """Record the arrival of a Gather's result webhook"""
+        with self.lock:
+            state = self.calls.get(call_sid)
+            if not state or not state['pending']:
+                return
+            pending, state['pending'] = state['pending'], None
+            report = self.report[state['mode']]
+
+            if not speech_result:
+                state['no_input'] += 1
+                report['no_input'] += 1
+                return
+
+            gap = time.time() - pending['sent_at']
+            delay = max(0.0, gap
+                        - pending['prompt_words'] / Config.BOT_WORDS_PER_SECOND
+                        - len(speech_result.split()) / Config.CALLER_WORDS_PER_SECOND
+                        - pending['speech_timeout'])
+            state['delays'].append(delay)
+            self.delays.append(delay)
+            report['answered'] += 1
+            report['gap_ms_total'] += gap * 1000
+
+    def call_ended(self, call_sid: str):
+        with self.lock:
+            state = self.calls.pop(call_sid, None)
+            if state:
+                # Reaching /voice/end with a Gather outstanding means its fallback ran
+                self._resolve_stale(state, force=True)
+
+    def stats(self) -> Dict:
+        with self.lock:
+            for state in self.calls.values():
+                self._resolve_stale(state)
+
+            result = {}
+            for mode, report in self.report.items():
+                gathers = report['gathers']
+                result[mode] = {
+                    'calls': report['calls'],
+                    'gathers': gathers,
+                    'answered': report['answered'],
+                    'no_input': report['no_input'],
+                    'no_input_rate': round(report['no_input'] / gathers, 4) if gathers else 0.0,
+                    'avg_turn_gap_ms': round(report['gap_ms_total'] / report['answered'], 1) if report['answered'] else None,
+                    'avg_timeout': round(report['timeout_total'] / gathers, 2) if gathers else None,
+                    'avg_speech_timeout': round(report['speech_timeout_total'] / gathers, 2) if gathers else None
+                }
+            result['global_median_delay_s'] = round(statistics.median(self.delays), 2) if self.delays else None
+            return result
+
+gather_tuner = GatherTuner()
+
+class CallQueue:
+    """Scheduled calls stored in SQLite - survives restarts, retries failed dials"""
+
+    @staticmethod
+    def enqueue(cursor, lead_id: int, phone_number: str, run_at: float) -> int:
+        """Queue a call inside the caller's transaction"""
+        cursor.execute(
+            "INSERT INTO call_jobs (lead_id, phone, run_at) VALUES (?, ?, ?)",
+            (lead_id, phone_number, run_at)
+        )
+        return cursor.lastrowid
+
+    @staticmethod
+    def claim_due(limit: int) -> List[Dict]:
+        """Atomically move due jobs to running.
+
+        Jobs still 'running' past CALL_JOB_LEASE_SECONDS belong to a dispatcher
+        that died mid-batch and are taken over here, on every tick - unless
+        dialed_at shows the dial went out, in which case the job is parked as
+        'unknown' rather than calling the lead twice.
+        """
+        now = time.time()
+        conn = sqlite3.connect('leads.db', isolation_level=None)
+        cursor = conn.cursor()
+        try:
+            cursor.execute("BEGIN IMMEDIATE")
+            cursor.execute(
+                "UPDATE call_jobs SET status = 'unknown', last_error = 'Dialed but the outcome was never recorded' "
+                "WHERE status = 'running' AND dialed_at IS NOT NULL AND (claimed_at IS NULL OR claimed_at < ?)",
+                (now - Config.CALL_JOB_LEASE_SECONDS,)
+            )
+            lost = cursor.rowcount
+            cursor.execute(
+                "SELECT id, lead_id, phone, attempts FROM call_jobs "
+                "WHERE (status = 'pending' AND run_at <= ?) "
+                "OR (status = 'running' AND (claimed_at IS NULL OR claimed_at < ?)) "
+                "ORDER BY run_at LIMIT ?",
+                (now, now - Config.CALL_JOB_LEASE_SECONDS, limit)
+            )
+            rows = cursor.fetchall()
+            if rows:
+                cursor.executemany(
+                    "UPDATE call_jobs SET status = 'running', claimed_at = ? WHERE id = ?",
+                    [(now, row[0]) for row in rows]
+                )
+            cursor.execute("COMMIT")
+        except Exception:
+            if conn.in_transaction:
+                cursor.execute("ROLLBACK")
+            raise
+        finally:
+            conn.close()
+
+        if lost:
+            logger.warning(f"Call queue: {lost} job(s) dialed with no recorded outcome, not redialing")
+        return [
+            {'id': row[0], 'lead_id': row[1], 'phone': row[2], 'attempts': row[3]}
+            for row in rows
+        ]
+
+    @staticmethod
+    def mark_dialing(job: Dict):
+        """Commit that the dial is about to go out, before Twilio is asked to place it"""
+        conn = sqlite3.connect('leads.db')
+        cursor = conn.cursor()
+        cursor.execute("UPDATE call_jobs SET dialed_at = ? WHERE id = ?", (time.time(), job['id']))
+        conn.commit()
+        conn.close()
+
+    @staticmethod
+    def record_attempt(job: Dict, call_sid: str = None, error: str = None) -> bool:
+        """Log the dial and either finish the job or push it back with backoff.
+
+        Returns True if the job will be retried.
+        """
+        attempt = job['attempts'] + 1
+        retry = error is not None and attempt < Config.CALL_MAX_ATTEMPTS
+
+        if error is None:
+            status, run_at = 'done', None
+        elif retry:
+            status, run_at = 'pending', time.time() + retry_delay(attempt)
+        else:
+            status, run_at = 'failed', None
+
+        # Attempt row, job status and the lead's call_scheduled flag commit together
+        conn = sqlite3.connect('leads.db', isolation_level=None)
+        cursor = conn.cursor()
+        try:
+            cursor.execute("BEGIN IMMEDIATE")
+            cursor.execute(
+                "INSERT INTO call_attempts (lead_id, job_id, attempt, call_sid, error) VALUES (?, ?, ?, ?, ?)",
+                (job['lead_id'], job['id'], attempt, call_sid, error)
+            )
+            cursor.execute(
+                "UPDATE call_jobs SET attempts = ?, status = ?, last_error = ?, run_at = COALESCE(?, run_at), "
+                "dialed_at = NULL WHERE id = ?",
+                (attempt, status, error, run_at, job['id'])
+            )
+            if error is None:
+                LeadManager.update_lead(cursor, job['lead_id'], call_scheduled=True)
+            cursor.execute("COMMIT")
+        except Exception:
+            if conn.in_transaction:
+                cursor.execute("ROLLBACK")
+            raise
+        finally:
+            conn.close()
+        return retry
+
+    @staticmethod
+    def record_outcome(job: Dict, call_sid: str = None, error: str = None) -> bool:
+        """record_attempt, retried until it commits.
+
+        Once the dial has gone out, giving up here would leave the job for lease
+        recovery, so a locked or briefly unavailable database is waited out.
+        """
+        delay = 0.5
+        while True:
+            try:
+                return CallQueue.record_attempt(job, call_sid=call_sid, error=error)
+            except sqlite3.Error as e:
+                logger.error(f"Call queue bookkeeping error for job {job['id']}, retrying in {delay}s: {e}")
+                time.sleep(delay)
+                delay = min(delay * 2, 30)
+
+    @staticmethod
+    def recover() -> int:
+        """Report what the dispatcher will pick up on its first tick after a restart"""
+        now = time.time()
+        conn = sqlite3.connect('leads.db')
+        cursor = conn.cursor()
+        cursor.execute(
+            "SELECT COUNT(*) FROM call_jobs WHERE status = 'running' AND (claimed_at IS NULL OR claimed_at < ?)",
+            (now - Config.CALL_JOB_LEASE_SECONDS,)
+        )
+        interrupted = cursor.fetchone()[0]
+        cursor.execute(
+            "SELECT COUNT(*) FROM call_jobs WHERE status = 'pending' AND run_at <= ?",
+            (now,)
+        )
+        overdue = cursor.fetchone()[0]
+        conn.close()
+
+        if interrupted or overdue:
+            logger.info(f"Call queue recovery: {interrupted} interrupted, {overdue} overdue")
+        return overdue
+
+def retry_delay(attempt: int) -> float:
+    """Exponential backoff with jitter so failed dials don't retry in lockstep"""
+    delay = min(Config.CALL_RETRY_MAX_SECONDS, Config.CALL_RETRY_BASE_SECONDS * 2 ** (attempt - 1))
+    return delay / 2 + random.uniform(0, delay / 2)
+
+def make_call(job: Dict):
+    """Dial a queued lead and record the outcome"""
+    lead_id = job['lead_id']
+    logger.info(f"Making call to {job['phone']} for lead {lead_id} (attempt {job['attempts'] + 1})")
+
+    # Only the dial itself decides retry vs done - bookkeeping errors must not redial
+    CallQueue.mark_dialing(job)
+    try:
+        call = twilio_client.calls.create(
+            url=f"{Config.WEBHOOK_BASE_URL}/voice/start/{lead_id}",
+            to=job['phone'],
             from_=Config.TWILIO_PHONE_NUMBER,
-            to=Config.ADMIN_PHONE
+            method='POST'
         )
-        
-        logger.info("Admin notified about interested lead")
-        
     except Exception as e:
-        logger.error(f"Failed to notify admin: {e}")
+        if CallQueue.record_outcome(job, error=str(e)):
+            logger.warning(f"Failed to make call for lead {lead_id}, will retry: {e}")
+        else:
+            logger.error(f"Failed to make call for lead {lead_id}, giving up: {e}")
+        return
+
+    CallQueue.record_outcome(job, call_sid=call.sid)
+    logger.info(f"Call initiated: {call.sid}")
+
+def dispatch_due_calls():
+    """Scheduler tick - dial every queued call whose time has come"""
+    try:
+        jobs = CallQueue.claim_due(Config.CALL_QUEUE_BATCH_SIZE)
+    except Exception as e:
+        logger.error(f"Call queue dispatch error: {e}")
+        return
+
+    for job in jobs:
+        try:
+            make_call(job)
+        except Exception as e:
+            # Never dialed - claim_due takes it over once its lease expires; keep dialing the rest of the batch
+            logger.error(f"Call queue bookkeeping error for job {job['id']}: {e}")
+
+def start_call_dispatcher():
+    """Report interrupted jobs and start polling the call queue"""
+    CallQueue.recover()
+    scheduler.add_job(
+        dispatch_due_calls,
+        'interval',
+        seconds=Config.CALL_QUEUE_POLL_SECONDS,
+        id='call_dispatcher',
+        replace_existing=True,
+        max_instances=1,
+        coalesce=True,
+        next_run_time=datetime.now()  # Dial overdue calls right away
+    )
+
+def notify_admin(lead_info: Dict):
+    """Send SMS to admin about interested lead.
+
+    Raises on failure so the caller can redeliver the notification.
+    """
+    message = f"""
+    🔥 NEW INTERESTED LEAD!
+    
+    Name: {lead_info['name']}
+    Email: {lead_info['email']}
+    Phone: {lead_info['phone']}
+    
+    They showed interest during the call!
+    """
+    
+    twilio_client.messages.create(
+        body=message,
+        from_=Config.TWILIO_PHONE_NUMBER,
+        to=Config.ADMIN_PHONE
+    )
+    
+    logger.info("Admin notified about interested lead")
+
+class CallEventQueue:
+    """Durable queue of finished calls waiting for post-call processing"""
+
+    @staticmethod
+    def enqueue(lead_id: int, call_sid: str, conversation_log: str) -> int:
+        conn = sqlite3.connect('leads.db')
+        cursor = conn.cursor()
+        cursor.execute(
+            "INSERT INTO call_events (lead_id, call_sid, conversation_log) VALUES (?, ?, ?)",
+            (lead_id, call_sid, conversation_log)
+        )
+        event_id = cursor.lastrowid
+        conn.commit()
+        conn.close()
+        call_events_ready.set()
+        return event_id
+
+    @staticmethod
+    def claim(limit: int) -> Tuple[str, List[Dict]]:
+        """Lease a batch of events - pending ones plus any whose lease expired.
+
+        Returns (lease_token, events); the token identifies this worker's lease.
+        """
+        now = time.time()
+        token = uuid.uuid4().hex
+        conn = sqlite3.connect('leads.db', isolation_level=None)
+        cursor = conn.cursor()
+        try:
+            cursor.execute("BEGIN IMMEDIATE")
+            cursor.execute(
+                "SELECT id, lead_id, call_sid, conversation_log, attempts, interested, notified FROM call_events "
+                "WHERE status = 'pending' OR (status = 'processing' AND claimed_at < ?) "
+                "ORDER BY id LIMIT ?",
+                (now - Config.CALL_EVENT_LEASE_SECONDS, limit)
+            )
+            rows = cursor.fetchall()
+            if rows:
+                cursor.executemany(
+                    "UPDATE call_events SET status = 'processing', claimed_at = ?, lease_token = ?, "
+                    "attempts = attempts + 1 WHERE id = ?",
+                    [(now, token, row[0]) for row in rows]
+                )
+            cursor.execute("COMMIT")
+        except Exception:
+            if conn.in_transaction:
+                cursor.execute("ROLLBACK")
+            raise
+        finally:
+            conn.close()
+
+        return token, [
+            {'id': row[0], 'lead_id': row[1], 'call_sid': row[2],
+             'conversation_log': row[3], 'attempts': row[4] + 1, 'interested': row[5],
+             'notified': bool(row[6])}
+            for row in rows
+        ]
+
+    @staticmethod
+    def renew(token: str) -> set:
+        """Extend the lease; returns the ids this worker still owns"""
+        conn = sqlite3.connect('leads.db')
+        cursor = conn.cursor()
+        cursor.execute(
+            "UPDATE call_events SET claimed_at = ? WHERE lease_token = ? AND status = 'processing'",
+            (time.time(), token)
+        )
+        cursor.execute(
+            "SELECT id FROM call_events WHERE lease_token = ? AND status = 'processing'",
+            (token,)
+        )
+        owned = {row[0] for row in cursor.fetchall()}
+        conn.commit()
+        conn.close()
+        return owned
+
+    @staticmethod
+    def save_intent(event: Dict, token: str):
+        """Keep the intent result so a redelivery doesn't pay for another LLM call"""
+        conn = sqlite3.connect('leads.db')
+        cursor = conn.cursor()
+        cursor.execute(
+            "UPDATE call_events SET interested = ? WHERE id = ? AND lease_token = ?",
+            (event['interested'], event['id'], token)
+        )
+        conn.commit()
+        conn.close()
+
+    @staticmethod
+    def mark_notified(event: Dict, token: str):
+        """Record a sent admin SMS so a redelivery of this event doesn't send it again"""
+        conn = sqlite3.connect('leads.db')
+        cursor = conn.cursor()
+        cursor.execute(
+            "UPDATE call_events SET notified = TRUE WHERE id = ? AND lease_token = ?",
+            (event['id'], token)
+        )
+        conn.commit()
+        conn.close()
+
+    @staticmethod
+    def ack(event: Dict, token: str):
+        conn = sqlite3.connect('leads.db')
+        cursor = conn.cursor()
+        cursor.execute("DELETE FROM call_events WHERE id = ? AND lease_token = ?", (event['id'], token))
+        conn.commit()
+        conn.close()
+
+    @staticmethod
+    def nack(event: Dict, token: str, error: str):
+        """Release an event for redelivery, parking it once it runs out of attempts"""
+        status = 'failed' if event['attempts'] >= Config.CALL_EVENT_MAX_ATTEMPTS else 'pending'
+        conn = sqlite3.connect('leads.db')
+        cursor = conn.cursor()
+        cursor.execute(
+            "UPDATE call_events SET status = ?, claimed_at = NULL, lease_token = NULL WHERE id = ? AND lease_token = ?",
+            (status, event['id'], token)
+        )
+        conn.commit()
+        conn.close()
+        logger.error(f"Post-call processing failed for event {event['id']} (lead {event['lead_id']}): {error}")
+
+call_events_ready = threading.Event()
+
+def process_call_events(token: str, events: List[Dict]):
+    """Score intent, persist results and notify admin for a batch of finished calls.
+
+    Each event is acked or nacked on its own. Persisting is idempotent, and the
+    admin SMS is marked sent only after Twilio accepts it - a failed send nacks
+    the event so it is retried, a sent one is skipped on redelivery.
+    """
+    scored = []
+    for event in events:
+        # Renew before each (possibly slow) LLM call; stop if another worker took over
+        if event['id'] not in CallEventQueue.renew(token):
+            logger.warning(f"Lost lease on call events batch {token}, abandoning")
+            return
+        try:
+            if event['interested'] is None:
+                event['interested'] = voice_bot.detect_intent(event['conversation_log'])
+                CallEventQueue.save_intent(event, token)
+            event['transcript'] = TranscriptIndex.format_transcript(json.loads(event['conversation_log']))
+            scored.append(event)
+        except Exception as e:
+            CallEventQueue.nack(event, token, str(e))
+
+    owned = CallEventQueue.renew(token)
+    scored = [event for event in scored if event['id'] in owned]
+    if not scored:
+        return
+
+    try:
+        LeadManager.complete_calls([(event['lead_id'], bool(event['interested'])) for event in scored])
+        TranscriptIndex.add_many([
+            (event['id'], event['lead_id'], event['call_sid'], event['transcript']) for event in scored
+        ])
+    except Exception as e:
+        for event in scored:
+            CallEventQueue.nack(event, token, str(e))
+        return
+
+    leads = {lead['id']: lead for lead in LeadManager.get_leads(
+        [event['lead_id'] for event in scored if event['interested']]
+    )}
+    for event in scored:
+        try:
+            if event['interested'] and not event['notified'] and event['lead_id'] in leads:
+                notify_admin(leads[event['lead_id']])
+                CallEventQueue.mark_notified(event, token)
+            CallEventQueue.ack(event, token)
+            logger.info(f"Call processed for lead {event['lead_id']}, interested: {bool(event['interested'])}")
+        except Exception as e:
+            CallEventQueue.nack(event, token, str(e))
+
+def call_event_worker():
+    """Worker loop - at-least-once: events are only deleted after processing succeeds"""
+    while True:
+        try:
+            token, events = CallEventQueue.claim(Config.CALL_EVENT_BATCH_SIZE)
+        except Exception as e:
+            logger.error(f"Call event claim error: {e}")
+            events = []
+
+        if not events:
+            call_events_ready.wait(Config.CALL_EVENT_POLL_SECONDS)
+            call_events_ready.clear()
+            continue
+
+        try:
+            process_call_events(token, events)
+        except Exception as e:
+            # Unexpected failure - whatever wasn't acked is redelivered after the lease
+            logger.error(f"Call event batch error: {e}")
+
+def start_call_event_workers():
+    for i in range(Config.CALL_EVENT_WORKERS):
+        threading.Thread(target=call_event_worker, name=f"call-event-worker-{i}", daemon=True).start()
+
+class TokenBucket:
+    """Classic token bucket - refills continuously, allows bursts up to capacity"""
+
+    def __init__(self, rate: float, capacity: float):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def try_acquire(self) -> bool:
+        with self.lock:
+            now = time.monotonic()
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            if self.tokens >= 1:
+                self.tokens -= 1
+                return True
+            return False
+
+class AdmissionController:
+    """Rate limits and bounds concurrent work on the lead intake path"""
+
+    MAX_TRACKED_IPS = 10000  # Oldest per-IP buckets are evicted past this
+
+    def __init__(self):
+        self.global_bucket = TokenBucket(Config.INTAKE_RATE_PER_SECOND, Config.INTAKE_BURST)
+        self.ip_buckets = OrderedDict()
+        self.workers = threading.BoundedSemaphore(Config.INTAKE_WORKERS)
+        self.lock = threading.Lock()
+        self.depth = 0
+        self.counters = {
+            'accepted': 0,
+            'rejected_ip_rate': 0,
+            'rejected_global_rate': 0,
+            'rejected_queue_full': 0,
+            'rejected_queue_timeout': 0,
+            'max_queue_depth': 0
+        }
+
+    def _ip_bucket(self, ip: str) -> TokenBucket:
+        with self.lock:
+            bucket = self.ip_buckets.get(ip)
+            if bucket is None:
+                bucket = TokenBucket(Config.INTAKE_IP_RATE_PER_MINUTE / 60, Config.INTAKE_IP_BURST)
+                self.ip_buckets[ip] = bucket
+                if len(self.ip_buckets) > self.MAX_TRACKED_IPS:
+                    self.ip_buckets.popitem(last=False)
+            else:
+                self.ip_buckets.move_to_end(ip)
+            return bucket
+
+    def _count(self, counter: str):
+        with self.lock:
+            self.counters[counter] += 1
+
+    def admit(self, ip: str) -> Optional[Tuple[int, str]]:
+        """Take an intake slot, or return (status, reason) if the request is shed.
+
+        Every successful admit must be paired with release().
+        """
+        if not self._ip_bucket(ip).try_acquire():
+            self._count('rejected_ip_rate')
+            return 429, 'Too many submissions, please try again later'
+
+        if not self.global_bucket.try_acquire():
+            self._count('rejected_global_rate')
+            return 429, 'We are receiving a lot of requests, please try again shortly'
+
+        with self.lock:
+            if self.depth >= Config.INTAKE_QUEUE_SIZE:
+                self.counters['rejected_queue_full'] += 1
+                return 503, 'Service busy, please try again shortly'
+            self.depth += 1
+            self.counters['max_queue_depth'] = max(self.counters['max_queue_depth'], self.depth)
+
+        if not self.workers.acquire(timeout=Config.INTAKE_QUEUE_WAIT_SECONDS):
+            with self.lock:
+                self.depth -= 1
+                self.counters['rejected_queue_timeout'] += 1
+            return 503, 'Service busy, please try again shortly'
+
+        self._count('accepted')
+        return None
+
+    def release(self):
+        self.workers.release()
+        with self.lock:
+            self.depth -= 1
+
+    def stats(self) -> Dict:
+        with self.lock:
+            return dict(self.counters, queue_depth=self.depth, tracked_ips=len(self.ip_buckets))
+
+intake_admission = AdmissionController()
+
+def client_ip() -> str:
+    """Client address as seen by the outermost trusted proxy.
+
+    Each proxy appends the address it received from, so only the rightmost
+    TRUSTED_PROXY_HOPS entries of X-Forwarded-For are trustworthy - anything
+    to their left is whatever the client chose to send.
+    """
+    hops = Config.TRUSTED_PROXY_HOPS
+    forwarded = [ip.strip() for ip in request.headers.get('X-Forwarded-For', '').split(',') if ip.strip()]
+    if hops and len(forwarded) >= hops:
+        return forwarded[-hops]
+    return request.remote_addr or 'unknown'
+
+class RequestProfiler:
+    """Opt-in cProfile capture of individual requests into a bounded ring of .prof files"""
+
+    def __init__(self):
+        self.counter = itertools.count(1)
+        # cProfile can't nest and per-request profiles should stay readable - one at a time
+        self.busy = threading.Lock()
+
+    def should_profile(self) -> bool:
+        if request.headers.get(Config.PROFILE_HEADER) == '1':
+            return True
+        return Config.PROFILE_SAMPLE_EVERY > 0 and next(self.counter) % Config.PROFILE_SAMPLE_EVERY == 0
+
+    def start(self):
+        if request.endpoint in ('list_profiles', 'serve_static') or not self.should_profile():
+            return
+        if not self.busy.acquire(blocking=False):
+            return
+        g.profiler = cProfile.Profile()
+        g.profile_started = time.perf_counter()
+        g.profiler.enable()
+
+    def stop(self, exc=None):
+        # Runs on teardown so the lock is released even if the view raised
+        profiler = g.pop('profiler', None)
+        if profiler is None:
+            return
+
+        profiler.disable()
+        try:
+            self.save(profiler, (time.perf_counter() - g.profile_started) * 1000)
+        except Exception as e:
+            logger.error(f"Profile save error: {e}")
+        finally:
+            self.busy.release()
+
+    def save(self, profiler, duration_ms: float):
+        os.makedirs(Config.PROFILE_DIR, exist_ok=True)
+        lead_id = (request.view_args or {}).get('lead_id')
+        call_sid = request.form.get('CallSid')
+        name = f"{int(time.time() * 1000)}_{request.endpoint}_{lead_id or '-'}"
+
+        profiler.dump_stats(os.path.join(Config.PROFILE_DIR, f"{name}.prof"))
+        with open(os.path.join(Config.PROFILE_DIR, f"{name}.json"), 'w') as f:
+            json.dump({
+                'name': name,
+                'route': request.path,
+                'endpoint': request.endpoint,
+                'lead_id': lead_id,
+                'call_sid': call_sid,
+                'duration_ms': round(duration_ms, 1),
+                'captured_at': datetime.now().isoformat(timespec='seconds')
+            }, f)
+
+        # Ring buffer: drop the oldest profiles once over the limit
+        profiles = sorted(f for f in os.listdir(Config.PROFILE_DIR) if f.endswith('.prof'))
+        for old in profiles[:-Config.PROFILE_MAX_FILES]:
+            for ext in ('.prof', '.json'):
+                path = os.path.join(Config.PROFILE_DIR, old[:-5] + ext)
+                if os.path.exists(path):
+                    os.remove(path)
+
+    @staticmethod
+    def list_profiles() -> List[Dict]:
+        if not os.path.isdir(Config.PROFILE_DIR):
+            return []
+        profiles = []
+        for filename in sorted(os.listdir(Config.PROFILE_DIR), reverse=True):
+            if filename.endswith('.json'):
+                with open(os.path.join(Config.PROFILE_DIR, filename)) as f:
+                    profiles.append(json.load(f))
+        return profiles
+
+    @staticmethod
+    def top_functions(name: str, limit: int) -> List[Dict]:
+        """Hottest functions by own time from a saved profile"""
+        stats = pstats.Stats(os.path.join(Config.PROFILE_DIR, f"{name}.prof"))
+        rows = sorted(stats.stats.items(), key=lambda item: item[1][2], reverse=True)[:limit]
+        return [
+            {
+                'function': f"{os.path.basename(filename)}:{line}({func})",
+                'calls': calls,
+                'own_ms': round(own * 1000, 2),
+                'cumulative_ms': round(cumulative * 1000, 2)
+            }
+            for (filename, line, func), (_, calls, own, cumulative, _) in rows
+        ]
+
+request_profiler = RequestProfiler()
+
+if Config.PROFILING_ENABLED:
+    app.before_request(request_profiler.start)
+    app.teardown_request(request_profiler.stop)
 
 # Web Routes
 @app.route('/')
@@ -517,6 +2209,11 @@ def home():
                 });
                 
                 const result = await response.json();
+                if (!response.ok) {
+                    document.getElementById('result').innerHTML = 
+                        `<div style="color: red;">${result.error}</div>`;
+                    return;
+                }
                 document.getElementById('result').innerHTML = 
                     `<div class="success">${result.message}</div>`;
                 e.target.reset();
@@ -534,6 +2231,12 @@ def home():
 @app.route('/submit-form', methods=['POST'])
 def submit_form():
     """Handle form submission and schedule call"""
+    # Shed load before touching SQLite so voice webhooks keep their threads
+    rejection = intake_admission.admit(client_ip())
+    if rejection:
+        status, message = rejection
+        return jsonify({'error': message}), status, {'Retry-After': '5'}
+    
     try:
         data = request.get_json()
         name = data.get('name')
@@ -543,13 +2246,20 @@ def submit_form():
         if not all([name, email, phone]):
             return jsonify({'error': 'Missing required fields'}), 400
         
-        # Save lead to database
-        lead_id = LeadManager.save_lead(name, email, phone)
+        phone_e164 = normalize_phone(phone)
+        if not phone_e164:
+            return jsonify({'error': 'Invalid phone number'}), 400
         
-        # Schedule call in 2 minutes
-        schedule_call(lead_id, phone, delay_minutes=2)
+        # Save lead to database (or refresh the existing one for this number)
+        # and schedule its call in 2 minutes
+        run_time = datetime.now() + timedelta(minutes=2)
+        lead_id, is_duplicate = LeadManager.save_lead(name, email, phone, phone_e164, run_time.timestamp())
         
-        logger.info(f"New lead submitted: {name} - {phone}")
+        if is_duplicate:
+            logger.info(f"Duplicate lead submission ignored: {name} - {phone_e164} (lead {lead_id})")
+        else:
+            logger.info(f"Call scheduled for {run_time}")
+            logger.info(f"New lead submitted: {name} - {phone_e164}")
         
         return jsonify({
             'message': 'Thank you! We will call you shortly to discuss our services.',
@@ -559,6 +2269,24 @@ def submit_form():
     except Exception as e:
         logger.error(f"Form submission error: {e}")
         return jsonify({'error': 'Internal server error'}), 500
+    
+    finally:
+        intake_admission.release()
+
+@app.route('/metrics/admission')
+def admission_metrics():
+    """Intake rejection counters and queue depth"""
+    return jsonify(intake_admission.stats())
+
+@app.route('/metrics/http')
+def http_metrics():
+    """Outbound HTTP latency, errors and connection reuse per upstream host"""
+    return jsonify(http_pool.stats())
+
+@app.route('/metrics/gather')
+def gather_metrics():
+    """Adaptive vs fixed Gather timeouts - no-input rate and turn round trip"""
+    return jsonify(gather_tuner.stats())
 
 @app.route('/voice/start/<int:lead_id>', methods=['POST'])
 def start_call(lead_id):
@@ -578,22 +2306,30 @@ def start_call(lead_id):
         # Shorter, more natural greeting for speed
         greeting = f"Hi {lead['name']}! This is Sarah from Digital Growth Solutions. Thanks for your interest in our services! I'd love to chat about how we can help your business grow online. Do you have 3 minutes to talk?"
         
+        call_sid = request.form.get('CallSid')
+        timeout, speech_timeout = gather_tuner.settings(call_sid, first=True)
         gather = Gather(
             input='speech',
             action=f'/voice/process/{lead_id}',
             method='POST',
-            timeout=8,  # Longer timeout for better listening
-            speechTimeout=3  # Better speech detection
+            timeout=timeout,  # Tuned to how quickly callers start answering
+            speechTimeout=speech_timeout
         )
         
         # SINGLE voice call - no double generation
+        tts_start = time.perf_counter()
         add_voice_to_response(response, greeting, gather, is_important=True)
+        tts_ms = (time.perf_counter() - tts_start) * 1000
         response.append(gather)
         
+        # The greeting is turn 0; history turns follow it from 1
+        turn_writer.add(lead_id, call_sid, 0, 'assistant', greeting, matched='greeting', tts_ms=tts_ms)
+        
         # Faster fallback
         response.say("I didn't catch that. No worries though! I'll have our team follow up with you via email with more information. Have a great day!", voice='Polly.Joanna-Neural')
         response.hangup()
         
+        gather_tuner.gather_sent(call_sid, greeting, timeout, speech_timeout)
         logger.info(f"TwiML response generated for lead {lead_id}")
         return str(response)
         
@@ -610,6 +2346,7 @@ def process_speech(lead_id):
     try:
         user_input = request.form.get('SpeechResult', '').strip()
         call_sid = request.form.get('CallSid')
+        gather_tuner.gather_result(call_sid, user_input)
         
         lead = LeadManager.get_lead(lead_id)
         if not lead:
@@ -621,8 +2358,10 @@ def process_speech(lead_id):
         # Add user input to history
         if user_input:
             context['history'].append({"role": "user", "content": user_input})
+            turn_writer.add(lead_id, call_sid, len(context['history']), 'user', user_input)
         
         # Generate bot response (FAST)
+        context['matched'], context['llm_ms'] = None, None
         bot_response = voice_bot.generate_response(user_input, context)
         context['history'].append({"role": "assistant", "content": bot_response})
         context['turn'] += 1
@@ -634,27 +2373,38 @@ def process_speech(lead_id):
         
         # Continue conversation or end call - LONGER CONVERSATIONS
         if context['turn'] < 5:  # Increased back to 5 turns for better conversations
+            timeout, speech_timeout = gather_tuner.settings(call_sid)
             gather = Gather(
                 input='speech',
                 action=f'/voice/process/{lead_id}',
                 method='POST',
-                timeout=8,  # Increased timeout for better listening
-                speechTimeout=2  # Better speech detection
+                timeout=timeout,  # Tuned to how quickly this caller answers
+                speechTimeout=speech_timeout
             )
             
             # SINGLE voice response - no double generation
+            tts_start = time.perf_counter()
             add_voice_to_response(response, bot_response, gather)
+            tts_ms = (time.perf_counter() - tts_start) * 1000
             response.append(gather)
             
             # Better fallback message
             response.say("I didn't hear anything, but no problem! I'll have our team send you some information via email. Thanks for your time and have a wonderful day!", voice='Polly.Joanna-Neural')
             response.redirect(f'/voice/end/{lead_id}')
+            gather_tuner.gather_sent(call_sid, bot_response, timeout, speech_timeout)
         else:
             # Final response
+            tts_start = time.perf_counter()
             add_voice_to_response(response, bot_response)
+            tts_ms = (time.perf_counter() - tts_start) * 1000
             response.say("Perfect! We'll contact you soon. Bye!", voice='Polly.Joanna-Neural')
             response.redirect(f'/voice/end/{lead_id}')
         
+        turn_writer.add(
+            lead_id, call_sid, len(context['history']), 'assistant', bot_response,
+            matched=context['matched'], llm_ms=context['llm_ms'], tts_ms=tts_ms
+        )
+        
         return str(response)
         
     except Exception as e:
@@ -666,35 +2416,16 @@ def process_speech(lead_id):
 
 @app.route('/voice/end/<int:lead_id>', methods=['POST'])
 def end_call(lead_id):
-    """Handle call end and analyze intent"""
+    """Handle call end - queue post-call processing and hang up immediately"""
     try:
         call_sid = request.form.get('CallSid')
         
-        # Get conversation history
-        context = voice_bot.conversation_context.get(call_sid, {'history': []})
-        conversation_log = json.dumps(context['history'])
+        # Take the conversation out of memory; background workers handle the rest
+        gather_tuner.call_ended(call_sid)
+        context = voice_bot.conversation_context.pop(call_sid, {'history': []})
+        CallEventQueue.enqueue(lead_id, call_sid, json.dumps(context['history']))
         
-        # Detect intent
-        is_interested = voice_bot.detect_intent(conversation_log)
-        
-        # Update lead record
-        LeadManager.update_lead(
-            lead_id,
-            call_completed=True,
-            interested=is_interested,
-            conversation_log=conversation_log
-        )
-        
-        # Notify admin if interested
-        if is_interested:
-            lead = LeadManager.get_lead(lead_id)
-            notify_admin(lead)
-        
-        # Clean up conversation context
-        if call_sid in voice_bot.conversation_context:
-            del voice_bot.conversation_context[call_sid]
-        
-        logger.info(f"Call ended for lead {lead_id}, interested: {is_interested}")
+        logger.info(f"Call ended for lead {lead_id}, queued for processing")
         
     except Exception as e:
         logger.error(f"Call end processing error: {e}")
@@ -712,6 +2443,8 @@ def view_leads():
     leads = cursor.fetchall()
     conn.close()
     
+    totals = LeadStats.totals()
+    
     html = """
     <html>
     <head>
@@ -731,12 +2464,17 @@ def view_leads():
     <body>
         <div class="nav">
             <a href="/leads">Leads Dashboard</a>
+            <a href="/leads/search">Search Calls</a>
             <a href="/logs">Error Logs</a>
             <a href="/">Contact Form</a>
         </div>
         <h1>📊 Leads Dashboard</h1>
         <p><strong>Total Leads:</strong> {}</p>
-    """.format(len(leads))
+        <p>Pending: {} | Called: {} | Interested: {} | Not Interested: {} | <a href="/leads/stats">JSON stats</a></p>
+    """.format(
+        sum(totals.values()), totals['pending'], totals['called'],
+        totals['interested'], totals['not_interested']
+    )
     
     html += """
         <table>
@@ -746,19 +2484,16 @@ def view_leads():
             </tr>
     """
     
+    status_display = {
+        'pending': ("pending", "Pending"),
+        'called': ("pending", "📞 Called"),
+        'interested': ("interested", "✅ INTERESTED"),
+        'not_interested': ("not-interested", "❌ Not Interested")
+    }
+    
     for lead in leads:
-        status_class = "pending"
-        status_text = "Pending"
-        
-        if lead[6]:  # call_completed
-            if lead[7]:  # interested
-                status_class = "interested"
-                status_text = "✅ INTERESTED"
-            else:
-                status_class = "not-interested"
-                status_text = "❌ Not Interested"
-        elif lead[5]:  # call_scheduled
-            status_text = "📞 Called"
+        # call_scheduled, call_completed, interested
+        status_class, status_text = status_display[lead_status(lead[5], lead[6], lead[7])]
         
         html += f"""
             <tr class="{status_class}">
@@ -771,6 +2506,175 @@ def view_leads():
     html += "</table></body></html>"
     return html
 
+@app.route('/leads/stats')
+def lead_stats():
+    """Dashboard counters as JSON - reads summary rows only, never scans leads"""
+    hours = min(max(request.args.get('hours', 24, type=int), 1), Config.STATS_MAX_HOURS)
+    days = min(max(request.args.get('days', 7, type=int), 1), Config.STATS_MAX_DAYS)
+    return jsonify(LeadStats.summary(hours, days))
+
+def export_response(kind: str):
+    fmt = request.args.get('format', 'csv')
+    if fmt not in LeadExporter.FORMATS:
+        return jsonify({'error': f"Format must be one of: {', '.join(LeadExporter.FORMATS)}"}), 400
+    
+    try:
+        filters = LeadExporter.parse_filters(
+            request.args.get('from'), request.args.get('to'), request.args.get('status')
+        )
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    
+    compress = request.args.get('gzip', '').lower() in ('1', 'true', 'yes')
+    filename = f"{kind}_{datetime.now():%Y%m%d_%H%M%S}.{fmt}" + ('.gz' if compress else '')
+    headers = {'Content-Disposition': f'attachment; filename="{filename}"'}
+    
+    return Response(
+        stream_with_context(LeadExporter.stream(kind, fmt, filters, compress)),
+        mimetype='application/gzip' if compress else LeadExporter.FORMATS[fmt],
+        headers=headers
+    )
+
+@app.route('/leads/export')
+def export_leads():
+    """Stream leads as CSV/NDJSON - ?format=&from=&to=&status=&gzip="""
+    return export_response('leads')
+
+@app.route('/leads/export/transcripts')
+def export_transcripts():
+    """Stream conversation turns as CSV/NDJSON - same filters, applied to the lead"""
+    return export_response('transcripts')
+
+@app.route('/leads/search')
+def search_leads():
+    """Full-text search over call transcripts (admin panel)"""
+    query = request.args.get('q', '').strip()
+    page = max(request.args.get('page', 1, type=int), 1)
+    page_size = Config.SEARCH_PAGE_SIZE
+    
+    results, error = [], None
+    if query:
+        try:
+            # Fetch one extra row to know whether there's a next page
+            results = TranscriptIndex.search(query, page_size + 1, (page - 1) * page_size)
+        except sqlite3.OperationalError as e:
+            error = f"Invalid search query: {e}"
+    
+    has_next = len(results) > page_size
+    results = results[:page_size]
+    
+    html_out = f"""
+    <html>
+    <head>
+        <title>Search Calls</title>
+        <style>
+            body {{ font-family: Arial, sans-serif; margin: 20px; }}
+            table {{ border-collapse: collapse; width: 100%; }}
+            th, td {{ border: 1px solid #ddd; padding: 8px; text-align: left; vertical-align: top; }}
+            th {{ background-color: #f2f2f2; }}
+            mark {{ background-color: #ffe066; }}
+            .snippet {{ white-space: pre-wrap; }}
+            .error {{ color: #721c24; }}
+            .nav {{ margin-bottom: 20px; }}
+            .nav a {{ margin-right: 10px; padding: 5px 10px; background: #007bff; color: white; text-decoration: none; }}
+        </style>
+    </head>
+    <body>
+        <div class="nav">
+            <a href="/leads">Leads Dashboard</a>
+            <a href="/leads/search">Search Calls</a>
+            <a href="/logs">Error Logs</a>
+            <a href="/">Contact Form</a>
+        </div>
+        <h1>🔍 Search Calls</h1>
+        <form method="get">
+            <input type="text" name="q" value="{html.escape(query)}" size="50" placeholder='e.g. ecommerce AND budget'>
+            <button type="submit">Search</button>
+        </form>
+    """
+    
+    if error:
+        html_out += f'<p class="error">{html.escape(error)}</p>'
+    elif query and not results:
+        html_out += "<p>No matching calls.</p>"
+    
+    if results:
+        html_out += """
+        <table>
+            <tr><th>Lead</th><th>Name</th><th>Phone</th><th>Interested</th><th>Transcript</th></tr>
+        """
+        for result in results:
+            snippet = html.escape(result['snippet'] or '')
+            snippet = snippet.replace('\x02', '<mark>').replace('\x03', '</mark>')
+            html_out += f"""
+            <tr>
+                <td>{result['lead_id']}</td><td>{html.escape(result['name'] or '')}</td>
+                <td>{html.escape(result['phone'] or '')}</td><td>{'✅' if result['interested'] else '❌'}</td>
+                <td class="snippet">{snippet}</td>
+            </tr>
+            """
+        html_out += "</table>"
+    
+        links = []
+        if page > 1:
+            links.append(f'<a href="?q={quote(query)}&page={page - 1}">← Previous</a>')
+        if has_next:
+            links.append(f'<a href="?q={quote(query)}&page={page + 1}">Next →</a>')
+        html_out += f"<p>Page {page} {' '.join(links)}</p>"
+    
+    html_out += "</body></html>"
+    return html_out
+
+@app.route('/profiles')
+def list_profiles():
+    """Captured request profiles with their hottest functions (admin panel)"""
+    html_out = f"""
+    <html>
+    <head>
+        <title>Request Profiles</title>
+        <style>
+            body {{ font-family: Arial, sans-serif; margin: 20px; }}
+            table {{ border-collapse: collapse; width: 100%; margin-bottom: 25px; }}
+            th, td {{ border: 1px solid #ddd; padding: 6px; text-align: left; font-size: 13px; }}
+            th {{ background-color: #f2f2f2; }}
+            .nav {{ margin-bottom: 20px; }}
+            .nav a {{ margin-right: 10px; padding: 5px 10px; background: #007bff; color: white; text-decoration: none; }}
+        </style>
+    </head>
+    <body>
+        <div class="nav">
+            <a href="/leads">Leads Dashboard</a>
+            <a href="/logs">Error Logs</a>
+        </div>
+        <h1>⏱️ Request Profiles</h1>
+        <p><strong>Profiling:</strong> {'✅ Enabled' if Config.PROFILING_ENABLED else '❌ Disabled (set PROFILING_ENABLED=1)'}
+        | Header: <code>{Config.PROFILE_HEADER}: 1</code>
+        | Sampling: {f'1 in {Config.PROFILE_SAMPLE_EVERY}' if Config.PROFILE_SAMPLE_EVERY else 'off'}</p>
+    """
+    
+    for profile in RequestProfiler.list_profiles():
+        try:
+            functions = RequestProfiler.top_functions(profile['name'], Config.PROFILE_TOP_N)
+        except Exception as e:
+            logger.error(f"Profile load error: {e}")
+            continue
+        
+        html_out += f"""
+        <h3>{html.escape(profile['route'])} - {profile['duration_ms']} ms</h3>
+        <p>{profile['captured_at']} | Lead: {profile['lead_id']} | Call SID: {html.escape(str(profile['call_sid']))}</p>
+        <table>
+            <tr><th>Function</th><th>Calls</th><th>Own ms</th><th>Cumulative ms</th></tr>
+        """
+        for function in functions:
+            html_out += f"""
+            <tr><td>{html.escape(function['function'])}</td><td>{function['calls']}</td>
+            <td>{function['own_ms']}</td><td>{function['cumulative_ms']}</td></tr>
+            """
+        html_out += "</table>"
+    
+    html_out += "</body></html>"
+    return html_out
+
 @app.route('/webhook-test')
 def webhook_test():
     """Test webhook connectivity"""
@@ -837,10 +2741,63 @@ def view_logs():
     </html>
     """
 
-if __name__ == '__main__':
-    # Initialize database
+def run_cli(argv: List[str]):
+    """Maintenance commands: python main.py <command>"""
+    parser = argparse.ArgumentParser(prog='main.py')
+    commands = parser.add_subparsers(dest='command', required=True)
+    commands.add_parser('rebuild-stats', help='Recompute dashboard counters from the leads table')
+    export = commands.add_parser('export', help='Stream leads or transcripts as CSV/NDJSON')
+    export.add_argument('kind', choices=list(LeadExporter.COLUMNS))
+    export.add_argument('--format', choices=list(LeadExporter.FORMATS), default='csv')
+    export.add_argument('--from', dest='start', help='First created date, YYYY-MM-DD')
+    export.add_argument('--to', dest='end', help='Last created date, YYYY-MM-DD (inclusive)')
+    export.add_argument('--status', choices=LeadStats.STATUSES)
+    export.add_argument('--gzip', action='store_true')
+    export.add_argument('--output', '-o', help='File to write (default: stdout)')
+    args = parser.parse_args(argv)
+    
     init_db()
     
+    if args.command == 'rebuild-stats':
+        LeadStats.rebuild()
+        print(f"Rebuilt lead stats: {LeadStats.totals()}")
+    
+    elif args.command == 'export':
+        try:
+            filters = LeadExporter.parse_filters(args.start, args.end, args.status)
+        except ValueError as e:
+            parser.error(str(e))
+        
+        out = open(args.output, 'wb') if args.output else sys.stdout.buffer
+        try:
+            for chunk in LeadExporter.stream(args.kind, args.format, filters, args.gzip):
+                out.write(chunk)
+        finally:
+            if args.output:
+                out.close()
+
+if __name__ == '__main__':
+    if len(sys.argv) > 1:
+        run_cli(sys.argv[1:])
+        sys.exit(0)
+    
+    app.debug = True
+    
+    # In debug mode the reloader re-runs this block in a watcher process;
+    # only the child that actually serves requests owns the database and workers
+    if not app.debug or os.environ.get('WERKZEUG_RUN_MAIN') == 'true':
+        # Initialize database
+        init_db()
+        migrate_conversation_logs()
+        TranscriptIndex.backfill()
+        start_turn_writer()
+        
+        # Pick up calls queued before the last restart
+        start_call_dispatcher()
+        
+        # Process finished calls in the background
+        start_call_event_workers()
+    
     # Check ngrok status
     ngrok_url = get_ngrok_url()
     
@@ -909,4 +2866,4 @@ if __name__ == '__main__':
         print("⚠️  WARNING: Start ngrok first to avoid 'application error'!")
         print("=" * 60)
     
-    app.run(debug=True, host='0.0.0.0', port=5000)
+    app.run(host='0.0.0.0', port=5000)